@@ -3,8 +3,8 @@
 Script para processar PDFs de comprovantes de pagamento e atualizar um arquivo Excel.
 
 Este script realiza as seguintes etapas:
-1. Permite ao usuário selecionar um arquivo Excel com os dados das transações.
-2. Permite ao usuário escolher a pasta base onde os PDFs estão organizados (por ano e mês).
+1. Permite ao usuário selecionar um arquivo Excel com os dados das transações (ou informá-lo via --excel).
+2. Permite ao usuário escolher a pasta base onde os PDFs estão organizados por ano e mês (ou --pdf-folder).
 3. Para cada registro do Excel, o script busca o PDF correspondente (com base na data) e procura
    por uma transação específica (usando o número da fatura ou o valor do pagamento).
 4. Se a transação for encontrada, a página é extraída e salva em uma subpasta "Notas".
@@ -13,13 +13,35 @@ Este script realiza as seguintes etapas:
 *Observação:* A senha para desbloqueio dos PDFs foi removida, pois os arquivos não estão criptografados.
 """
 
+import argparse
+import gc
+import importlib.util
+import io
+import math
 import os
 import re
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from functools import lru_cache
+import ahocorasick
 import pandas as pd
+import pypdfium2 as pdfium
 from PyPDF2 import PdfReader, PdfWriter
-import tkinter as tk
-from tkinter import filedialog
-from openpyxl import load_workbook
+from openpyxl import Workbook, load_workbook
+
+# Colunas do Excel utilizadas pelo script (inclui os nomes alternativos renomeados em main())
+COLUNAS_EXCEL = {
+    "Vencimento",
+    "( R$ )",
+    "Encontrado",
+    "Número da Fatura",
+    "Data de\nPagamento",
+    "Valor\npagamento\nlíquido (R$)",
+}
+
+# Tabela de tradução do separador de milhar/decimal do formato americano para o brasileiro
+TABELA_PTBR = str.maketrans(",.", ".,")
 
 def escolher_arquivo_excel():
     """
@@ -28,6 +50,10 @@ def escolher_arquivo_excel():
     Retorna:
         str: Caminho do arquivo Excel selecionado.
     """
+    # Importado aqui para que execuções sem interface (e os processos do pool) não carreguem o Tk
+    import tkinter as tk
+    from tkinter import filedialog
+
     root = tk.Tk()
     root.withdraw()  # Oculta a janela principal
     file_path = filedialog.askopenfilename(
@@ -44,12 +70,27 @@ def escolher_pasta_base():
     Retorna:
         str: Caminho da pasta base selecionada.
     """
+    import tkinter as tk
+    from tkinter import filedialog
+
     root = tk.Tk()
     root.withdraw()
     folder_path = filedialog.askdirectory(title="Selecione a pasta base dos PDFs")
     root.destroy()
     return folder_path
 
+def interface_disponivel():
+    """
+    Indica se há uma tela onde as janelas de seleção do Tk podem ser abertas.
+    Não depende de sys.stdin, que é None sob pythonw e não é um terminal nos consoles de IDEs.
+
+    Retorna:
+        bool: True se as janelas de seleção podem ser exibidas.
+    """
+    if sys.platform == "win32" or sys.platform == "darwin":
+        return True
+    return bool(os.environ.get("DISPLAY") or os.environ.get("WAYLAND_DISPLAY"))
+
 def formatar_valor_ptbr(valor_float: float) -> str:
     """
     Converte um valor float no formato monetário brasileiro.
@@ -61,140 +102,436 @@ def formatar_valor_ptbr(valor_float: float) -> str:
     Retorna:
         str: Valor formatado.
     """
-    valor_str_us = f"{valor_float:,.2f}"
-    valor_str_br = valor_str_us.replace(",", "X").replace(".", ",").replace("X", ".")
-    return f"R$ {valor_str_br}"
+    # Troca "," por "." e vice-versa em uma única passada
+    return f"R$ {valor_float:,.2f}".translate(TABELA_PTBR)
 
-def processar_registro(row, base_pdf_folder):
+def padrao_valor_ptbr(valor_float: float) -> str:
     """
-    Processa um registro do DataFrame, buscando a transação no PDF correspondente
-    e exportando a página onde a transação foi encontrada.
+    Monta diretamente o regex do valor monetário brasileiro, tolerando espaços após "R$".
+    Exemplo: 170606.16 -> 'R\\$\\s*170\\.606,16'
 
     Args:
-        row (pandas.Series): Linha do DataFrame com os dados da transação.
-        base_pdf_folder (str): Caminho da pasta base onde estão os PDFs.
+        valor_float (float): Valor a ser procurado.
 
     Retorna:
-        bool: True se a transação for encontrada e processada com sucesso, False caso contrário.
+        str: Expressão regular do valor.
     """
-    # Extrai data e valor da transação
-    vencimento = row["Vencimento"]
-    valor_pagamento = row["( R$ )"]
+    inteiro, centavos = f"{valor_float:,.2f}".split(".")
+    inteiro = inteiro.replace(",", r"\.")
+    return rf"R\$\s*{inteiro},{centavos}"
 
-    try:
-        data_formatada = pd.to_datetime(vencimento)
-    except Exception as e:
-        print(f"[ERRO] Não foi possível converter a data '{vencimento}': {e}")
-        return False
+@lru_cache(maxsize=4096)
+def compilar_padrao(padrao):
+    """
+    Compila o padrão regex uma única vez; registros com o mesmo valor reutilizam o objeto compilado.
 
-    # Define as pastas com base na data: ano e mês
-    ano = data_formatada.year
-    pasta_ano = f"Comprovantes de pagamento - {ano}"
-    month_folder = data_formatada.strftime("%m.%Y")
-    pasta_pdf_mes = os.path.join(base_pdf_folder, pasta_ano, month_folder)
-    
-    if not os.path.exists(pasta_pdf_mes):
-        print(f"[ERRO] Pasta do mês '{pasta_pdf_mes}' não encontrada.")
-        return False
+    Args:
+        padrao (str): Expressão regular.
 
-    # Define o nome do PDF com base no dia e mês (ex.: "15 03.pdf")
-    nome_pdf = data_formatada.strftime("%d %m") + ".pdf"
-    caminho_pdf = os.path.join(pasta_pdf_mes, nome_pdf)
+    Retorna:
+        re.Pattern: Padrão compilado.
+    """
+    return re.compile(padrao)
 
-    if not os.path.exists(caminho_pdf):
-        print(f"[ERRO] Arquivo PDF '{caminho_pdf}' não encontrado.")
-        return False
+def montar_caminhos_pdf(pastas_mes, dias_mes, base_pdf_folder):
+    """
+    Monta, de forma vetorizada, o caminho do PDF de comprovantes de cada data de vencimento.
+    Exemplo: ("03.2024", "15 03") -> '<base>/Comprovantes de pagamento - 2024/03.2024/15 03.pdf'
 
-    try:
-        leitor = PdfReader(caminho_pdf)
-    except Exception as e:
-        print(f"[ERRO] Erro ao abrir o PDF '{caminho_pdf}': {e}")
-        return False
+    Args:
+        pastas_mes (pandas.Series): Pasta do mês de cada registro ("%m.%Y"; NaN para datas inválidas).
+        dias_mes (pandas.Series): Dia e mês de cada registro ("%d %m"; NaN para datas inválidas).
+        base_pdf_folder (str): Caminho da pasta base onde estão os PDFs.
+
+    Retorna:
+        pandas.Series: Caminho do PDF de cada registro (NaN onde a data é inválida).
+    """
+    # Pastas por ano e mês (ex.: "Comprovantes de pagamento - 2024/03.2024") e PDF por dia (ex.: "15 03.pdf").
+    # O ano é reaproveitado do nome da pasta do mês, sem uma terceira chamada a strftime.
+    return (
+        base_pdf_folder + os.sep
+        + "Comprovantes de pagamento - " + pastas_mes.str[-4:] + os.sep
+        + pastas_mes + os.sep
+        + dias_mes + ".pdf"
+    )
+
+def iterar_textos_paginas(pdf, caminho_pdf):
+    """
+    Extrai, sob demanda, o texto de cada página do PDF com o PDFium (pypdfium2), bem mais
+    rápido que o extrator do PyPDF2. Quem consome pode interromper a iteração, e as
+    páginas restantes não são lidas.
 
+    Args:
+        pdf (pdfium.PdfDocument): Documento já aberto.
+        caminho_pdf (str): Caminho do arquivo PDF (usado nas mensagens de erro).
+
+    Retorna:
+        Iterator[str]: Texto de cada página do PDF.
+    """
+    for indice in range(len(pdf)):
+        pagina = textpage = None
+        try:
+            pagina = pdf[indice]
+            textpage = pagina.get_textpage()
+            texto = textpage.get_text_range()
+        except Exception as e:
+            print(f"[ERRO] Falha ao extrair texto da página {indice} do PDF '{caminho_pdf}': {e}")
+            texto = ""
+        finally:
+            # Libera página e texto no PDFium imediatamente, sem esperar o coletor de lixo
+            if textpage is not None:
+                textpage.close()
+            if pagina is not None:
+                pagina.close()
+        # Quebras de linha são mantidas: o "\s*" do padrão de busca já casa com elas
+        yield texto
+
+def criterio_busca(valor_pagamento, numero_fatura, dia_mes):
+    """
+    Define o critério de busca de um registro do DataFrame.
+
+    Args:
+        valor_pagamento: Valor do pagamento (coluna "( R$ )").
+        numero_fatura: Número da fatura (coluna "Número da Fatura"), ou NA se ausente.
+        dia_mes (str): Dia e mês da transação (ex.: "15 03"), usado no nome do arquivo de saída.
+
+    Retorna:
+        tuple | None: (valor buscado, tipo de busca, padrão regex compilado ou None para busca
+        literal, nome do arquivo de saída), ou None se o registro não tiver critério válido.
+    """
     # Define o critério de busca: prioriza "Número da Fatura", se disponível; caso contrário, utiliza o valor do pagamento
-    numero_fatura = row.get("Número da Fatura", None)
-    if numero_fatura is not None and pd.notna(numero_fatura):
+    if pd.notna(numero_fatura):
         search_value = str(numero_fatura).strip()
         search_type = "Número da Fatura"
+        # Sem espaços internos o número é um literal e dispensa regex; com espaços, eles ficam flexíveis
+        if " " in search_value:
+            search_value_pattern = re.escape(search_value).replace(r'\ ', r'\s*')
+        else:
+            search_value_pattern = None
+        nome_saida = f"Comprov_nf {search_value}_{dia_mes}.pdf"
     else:
         try:
             valor_float = float(valor_pagamento)
         except Exception as e:
             print(f"[ERRO] Valor de pagamento inválido '{valor_pagamento}': {e}")
-            return False
-        valor_str = f"{valor_float:.2f}"
+            return None
+        # Células vazias chegam como NaN, que float() aceita sem erro
+        if not math.isfinite(valor_float):
+            print(f"[ERRO] Valor de pagamento inválido '{valor_pagamento}'.")
+            return None
         search_value = formatar_valor_ptbr(valor_float)
+        search_value_pattern = padrao_valor_ptbr(valor_float)
         search_type = "Valor pagamento"
+        nome_saida = f"Comprov_nf {valor_float:.2f}_{dia_mes}.pdf"
 
-    # Cria um padrão regex para procurar o valor ou número da fatura no texto do PDF
-    search_value_esc = re.escape(search_value)
-    search_value_pattern = search_value_esc.replace(r'\ ', r'\s*')
-    pattern = re.compile(search_value_pattern)
+    pattern = compilar_padrao(search_value_pattern) if search_value_pattern is not None else None
+    return search_value, search_type, pattern, nome_saida
 
-    pagina_alvo = None
-    for indice, pagina in enumerate(leitor.pages):
-        try:
-            texto = pagina.extract_text()
-            if texto:
-                texto = texto.replace("\n", " ")
-        except Exception as e:
-            print(f"[ERRO] Falha ao extrair texto da página {indice} do PDF '{caminho_pdf}': {e}")
-            continue
+def remover_espacos(texto):
+    """
+    Remove todos os espaços em branco (inclusive quebras de linha) do texto.
+    str.split() sem argumentos faz a separação em C, mais barato que um regex "\\s+".
 
-        if texto and re.search(pattern, texto):
-            pagina_alvo = indice
-            print(f"[INFO] Transação com {search_type} '{search_value}' encontrada na página {indice} do PDF '{nome_pdf}'.")
-            break
+    Args:
+        texto (str): Texto original.
 
-    if pagina_alvo is None:
-        print(f"[AVISO] Transação com {search_type} '{search_value}' não encontrada em '{nome_pdf}'.")
-        return False
+    Retorna:
+        str: Texto sem espaços.
+    """
+    return "".join(texto.split())
 
-    # Cria o PDF contendo apenas a página com a transação encontrada
-    writer = PdfWriter()
-    writer.add_page(leitor.pages[pagina_alvo])
+def localizar_paginas(buscas, textos_paginas):
+    """
+    Procura todas as transações de um mesmo PDF varrendo o texto de cada página uma única vez
+    com um autômato de Aho–Corasick, em vez de um regex por registro e por página.
 
-    # Define o nome do arquivo de saída conforme o critério de busca
-    if search_type == "Número da Fatura":
-        nome_saida = f"Comprov_nf {search_value}_{data_formatada.strftime('%d %m')}.pdf"
-    else:
-        nome_saida = f"Comprov_nf {valor_str}_{data_formatada.strftime('%d %m')}.pdf"
+    O autômato trabalha sobre o texto sem espaços (para tolerar espaços variáveis, como em
+    "R$ 170.606,16"); cada candidato é confirmado no texto original com o critério exato.
+
+    Args:
+        buscas (list): Critérios de busca retornados por criterio_busca.
+        textos_paginas (Iterable[str]): Texto de cada página do PDF, em ordem.
+
+    Retorna:
+        list: Índice da primeira página onde cada transação foi encontrada (None se não encontrada).
+    """
+    paginas = [None] * len(buscas)
+
+    posicoes_por_chave = {}
+    for posicao, (search_value, _, _, _) in enumerate(buscas):
+        chave = remover_espacos(search_value)
+        if chave:
+            posicoes_por_chave.setdefault(chave, []).append(posicao)
+    if not posicoes_por_chave:
+        return paginas
+
+    automato = ahocorasick.Automaton()
+    for chave, posicoes in posicoes_por_chave.items():
+        automato.add_word(chave, posicoes)
+    automato.make_automaton()
+
+    pendentes = sum(len(posicoes) for posicoes in posicoes_por_chave.values())
+    for indice, texto in enumerate(textos_paginas):
+        if not texto:
+            continue
+        for _, posicoes in automato.iter(remover_espacos(texto)):
+            for posicao in posicoes:
+                if paginas[posicao] is not None:
+                    continue
+                search_value, _, pattern, _ = buscas[posicao]
+                if pattern.search(texto) if pattern is not None else search_value in texto:
+                    paginas[posicao] = indice
+                    pendentes -= 1
+        # Todas as transações do PDF já foram encontradas: as páginas restantes não são varridas
+        if pendentes == 0:
+            break
+    return paginas
 
-    # Cria a pasta "Notas" dentro da pasta do mês (caso não exista)
-    pasta_saida = os.path.join(pasta_pdf_mes, "Notas")
-    if not os.path.exists(pasta_saida):
-        os.makedirs(pasta_saida)
-    caminho_saida = os.path.join(pasta_saida, nome_saida)
+def exportar_pagina(leitor, pagina_alvo, caminho_saida, paginas_serializadas):
+    """
+    Salva em um novo PDF apenas a página onde a transação foi encontrada.
+    Cada página é serializada uma única vez por PDF de origem: se outro registro do mesmo
+    grupo cair na mesma página, os bytes já gerados são reaproveitados.
 
+    Args:
+        leitor (PdfReader): Leitor do PDF de origem.
+        pagina_alvo (int): Índice da página a ser exportada.
+        caminho_saida (str): Caminho do PDF de saída.
+        paginas_serializadas (dict): Cache {índice da página: bytes do PDF} do grupo.
+
+    Retorna:
+        bool: True se a página for exportada com sucesso, False caso contrário.
+    """
     try:
+        conteudo = paginas_serializadas.get(pagina_alvo)
+        if conteudo is None:
+            writer = PdfWriter()
+            writer.add_page(leitor.pages[pagina_alvo])
+            buffer = io.BytesIO()
+            writer.write(buffer)
+            conteudo = paginas_serializadas[pagina_alvo] = buffer.getvalue()
         with open(caminho_saida, "wb") as f_out:
-            writer.write(f_out)
+            f_out.write(conteudo)
         print(f"[SUCESSO] Página exportada para '{caminho_saida}'.")
         return True
     except Exception as e:
         print(f"[ERRO] Falha ao exportar o PDF '{caminho_saida}': {e}")
         return False
 
-def main():
+def processar_grupo(caminho_pdf, dia_mes, pdf_existe, registros):
+    """
+    Processa todos os registros que apontam para o mesmo PDF, lendo-o uma única vez.
+
+    Args:
+        caminho_pdf (str): Caminho do PDF compartilhado pelos registros.
+        dia_mes (str): Dia e mês do PDF (ex.: "15 03").
+        pdf_existe (bool): Se o PDF existe (verificado previamente em main()).
+        registros (list): Lista de tuplas (índice, vencimento, valor, número da fatura).
+
+    Retorna:
+        list: Tuplas (índice, True se a transação foi encontrada, False caso contrário).
+    """
+    pasta_pdf_mes, nome_pdf = os.path.split(caminho_pdf)
+    if not pdf_existe:
+        if not os.path.exists(pasta_pdf_mes):
+            print(f"[ERRO] Pasta do mês '{pasta_pdf_mes}' não encontrada.")
+        else:
+            print(f"[ERRO] Arquivo PDF '{caminho_pdf}' não encontrado.")
+        return [(registro[0], False) for registro in registros]
+
+    # Define o critério de busca de cada registro
+    resultados = []
+    buscas = []
+    for i, vencimento, valor_pagamento, numero_fatura in registros:
+        print(f"\n[INFO] Processando registro {i+1} - Vencimento: {vencimento} | ( R$ ): {valor_pagamento}")
+        try:
+            busca = criterio_busca(valor_pagamento, numero_fatura, dia_mes)
+        except Exception as e:
+            # Um registro com dados inesperados não deve interromper o processamento dos demais
+            print(f"[ERRO] Falha ao definir o critério de busca do registro {i+1}: {e}")
+            busca = None
+        if busca is None:
+            resultados.append((i, False))
+        else:
+            buscas.append((i, busca))
+
+    # Procura todos os registros de uma vez no texto do PDF. As páginas são lidas sob demanda do
+    # documento já aberto, para que a extração pare assim que todas as transações forem encontradas.
+    try:
+        pdf = pdfium.PdfDocument(caminho_pdf)
+        try:
+            paginas = localizar_paginas([busca for _, busca in buscas], iterar_textos_paginas(pdf, caminho_pdf))
+        finally:
+            pdf.close()
+    except Exception as e:
+        print(f"[ERRO] Erro ao abrir o PDF '{caminho_pdf}': {e}")
+        return [(registro[0], False) for registro in registros]
+
+    # O PyPDF2 só é usado para copiar as páginas encontradas, então o PdfReader só é aberto se houver acerto
+    leitor = None
+    if any(pagina_alvo is not None for pagina_alvo in paginas):
+        try:
+            leitor = PdfReader(caminho_pdf)
+        except Exception as e:
+            print(f"[ERRO] Erro ao abrir o PDF '{caminho_pdf}': {e}")
+            return [(registro[0], False) for registro in registros]
+
+    paginas_serializadas = {}
+    try:
+        for (i, (search_value, search_type, _, nome_saida)), pagina_alvo in zip(buscas, paginas):
+            if pagina_alvo is None:
+                print(f"[AVISO] Transação com {search_type} '{search_value}' não encontrada em '{nome_pdf}'.")
+                resultados.append((i, False))
+                continue
+            print(f"[INFO] Transação com {search_type} '{search_value}' encontrada na página {pagina_alvo} do PDF '{nome_pdf}'.")
+
+            # A pasta "Notas" já foi criada em main(); se faltar, a abertura do arquivo acusa o erro
+            caminho_saida = os.path.join(pasta_pdf_mes, "Notas", nome_saida)
+            resultados.append((i, exportar_pagina(leitor, pagina_alvo, caminho_saida, paginas_serializadas)))
+    finally:
+        # O PdfReader tem referências cíclicas: libera-o já, para limitar a memória de cada processo do pool
+        if leitor is not None:
+            leitor = None
+            paginas_serializadas.clear()
+            gc.collect()
+    return resultados
+
+def processar_grupo_worker(tarefa):
+    """
+    Ponto de entrada executado nos processos do pool para um PDF e seus registros.
+
+    Args:
+        tarefa (tuple): Tupla (caminho do PDF, dia e mês, se o PDF existe, lista de registros).
+
+    Retorna:
+        list: Tuplas (índice, True se a transação foi encontrada, False caso contrário).
+    """
+    caminho_pdf, dia_mes, pdf_existe, registros = tarefa
+    return processar_grupo(caminho_pdf, dia_mes, pdf_existe, registros)
+
+def texto_numero_fatura(valor):
+    """
+    Converte o número da fatura lido do Excel no texto usado na busca.
+    Exemplo: 98765.0 (célula numérica) -> '98765'
+
+    Args:
+        valor: Valor da célula "Número da Fatura".
+
+    Retorna:
+        str | NA: Número da fatura como texto, ou NA se a célula estiver vazia.
+    """
+    if pd.isna(valor):
+        return pd.NA
+    if isinstance(valor, float) and valor.is_integer():
+        return str(int(valor))
+    return str(valor)
+
+def gravar_excel_write_only(df, arquivo_excel):
+    """
+    Regrava o arquivo Excel do zero com o openpyxl em modo write-only, sem carregar o
+    workbook existente. Usado com --overwrite: a formatação e as demais abas do arquivo
+    original são descartadas, mas o nome da primeira aba (a lida pelo script) é mantido.
+
+    Args:
+        df (pandas.DataFrame): Dados a gravar (cabeçalho e linhas).
+        arquivo_excel (str): Caminho do arquivo Excel.
+    """
+    # O openpyxl usa automaticamente o backend XML acelerado do lxml, se estiver instalado
+    if importlib.util.find_spec("lxml") is None:
+        print("[AVISO] lxml não está instalado; a gravação do Excel será mais lenta.")
+
+    with pd.ExcelFile(arquivo_excel) as arquivo:
+        titulo_aba = arquivo.sheet_names[0]
+
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet(titulo_aba)
+    # Cabeçalhos vazios são lidos pelo pandas como "Unnamed: N" e voltam a ser células vazias
+    ws.append([None if re.fullmatch(r"Unnamed: \d+", str(col)) else col for col in df.columns])
+    # Valores ausentes (NaN, NaT, NA) viram células vazias
+    valores = df.astype(object).where(df.notna(), None)
+    for linha in valores.itertuples(index=False, name=None):
+        ws.append(linha)
+    wb.save(arquivo_excel)
+
+def parse_args(argv=None):
+    """
+    Lê os argumentos de linha de comando.
+
+    Args:
+        argv (list | None): Argumentos (por padrão, sys.argv[1:]).
+
+    Retorna:
+        argparse.Namespace: Argumentos lidos.
+    """
+    parser = argparse.ArgumentParser(
+        description="Processa PDFs de comprovantes de pagamento e atualiza a coluna 'Encontrado' do Excel."
+    )
+    parser.add_argument("--excel", help="Arquivo Excel com os dados das transações.")
+    parser.add_argument("--pdf-folder", help="Pasta base onde os PDFs estão organizados por ano e mês.")
+    parser.add_argument(
+        "--jobs", type=int, default=min(os.cpu_count() or 1, 4),
+        help="Número de processos usados no processamento dos PDFs (padrão: núcleos da CPU, até 4).",
+    )
+    parser.add_argument(
+        "--overwrite", action="store_true",
+        help="Regrava o Excel do zero (modo rápido, sem preservar formatação nem outras abas).",
+    )
+    return parser.parse_args(argv)
+
+def main(argv=None):
     """
     Função principal que orquestra o fluxo do script:
-      1. Seleciona o arquivo Excel.
-      2. Seleciona a pasta base dos PDFs.
-      3. Processa cada registro do Excel.
+      1. Obtém o arquivo Excel (--excel ou janela de seleção).
+      2. Obtém a pasta base dos PDFs (--pdf-folder ou janela de seleção).
+      3. Processa os registros do Excel em paralelo.
       4. Atualiza a coluna "Encontrado" no arquivo Excel.
+
+    As janelas de seleção só são abertas quando há uma tela disponível; em execuções sem
+    interface gráfica, os caminhos devem ser informados pelos argumentos.
     """
-    arquivo_excel = escolher_arquivo_excel()
+    args = parse_args(argv)
+    interativo = interface_disponivel()
+
+    arquivo_excel = args.excel
+    if not arquivo_excel and interativo:
+        arquivo_excel = escolher_arquivo_excel()
     if not arquivo_excel:
         print("Nenhum arquivo foi selecionado. Encerrando o programa.")
         return
 
-    base_pdf_folder = escolher_pasta_base()
+    base_pdf_folder = args.pdf_folder
+    if not base_pdf_folder and interativo:
+        base_pdf_folder = escolher_pasta_base()
     if not base_pdf_folder:
         print("Nenhuma pasta foi selecionada. Encerrando o programa.")
         return
 
+    # Com --overwrite o arquivo é regravado a partir do DataFrame, então "Número da Fatura" é lido
+    # no tipo original (números continuam números) e convertido para texto só na busca
+    if args.overwrite:
+        tipos_colunas = {"Encontrado": "string"}
+    else:
+        tipos_colunas = {"Número da Fatura": "string", "Encontrado": "string"}
+
     try:
-        df = pd.read_excel(arquivo_excel)
+        try:
+            # Lê apenas as colunas usadas, já com os tipos corretos e as datas convertidas.
+            # Com --overwrite todas as colunas são lidas, pois o arquivo será regravado a partir do DataFrame,
+            # e as datas não são convertidas aqui: uma única célula inválida faria a coluna inteira virar texto.
+            df = pd.read_excel(
+                arquivo_excel,
+                usecols=None if args.overwrite else ["Vencimento", "( R$ )", "Encontrado", "Número da Fatura"],
+                dtype=tipos_colunas,
+                parse_dates=None if args.overwrite else ["Vencimento"],
+            )
+        except ValueError:
+            # Planilha com outros nomes de coluna: lê as colunas conhecidas e ajusta os nomes abaixo
+            df = pd.read_excel(
+                arquivo_excel,
+                usecols=None if args.overwrite else (lambda col: str(col).strip() in COLUNAS_EXCEL),
+                dtype=tipos_colunas,
+            )
+        cabecalho_original = list(df.columns)
         # Remove espaços extras dos nomes das colunas
         df.columns = df.columns.str.strip()
         expected_cols = ["Vencimento", "( R$ )", "Encontrado"]
@@ -209,15 +546,101 @@ def main():
         print(f"[ERRO] Não foi possível ler o arquivo Excel '{arquivo_excel}': {e}")
         return
 
-    # Processa cada registro e atualiza a coluna "Encontrado"
-    for i, row in df.iterrows():
+    for col in ["Vencimento", "( R$ )"]:
+        if col not in df.columns:
+            print(f"[ERRO] Chave não encontrada: '{col}'")
+            return
+    if "Número da Fatura" not in df.columns:
+        df["Número da Fatura"] = pd.NA
+    df["_nf"] = df["Número da Fatura"].map(texto_numero_fatura)
+
+    # Calcula data e caminho do PDF de todos os registros de uma vez
+    # format="mixed" interpreta cada valor separadamente, como pd.to_datetime faria linha a linha;
+    # sem ele o pandas deduz um único formato pelo primeiro valor e descarta os demais como NaT
+    df["_dt"] = pd.to_datetime(df["Vencimento"], errors="coerce", format="mixed")
+    # Pasta do mês e dia/mês formatados de forma vetorizada, uma única vez para todos os registros
+    df["_month_folder"] = df["_dt"].dt.strftime("%m.%Y")
+    df["_day_month"] = df["_dt"].dt.strftime("%d %m")
+    df["_pdf_path"] = montar_caminhos_pdf(df["_month_folder"], df["_day_month"], base_pdf_folder)
+    for i, vencimento in df.loc[df["_dt"].isna(), "Vencimento"].items():
+        print(f"[ERRO] Não foi possível converter a data '{vencimento}' (registro {i+1}).")
+    df.loc[df["_pdf_path"].isna(), "Encontrado"] = "Não"
+
+    # Lista cada pasta de mês uma única vez (os.scandir), em vez de um stat() por PDF ou registro.
+    # Os caminhos são comparados com os.path.normcase, pois no Windows "15 03.PDF" é o mesmo arquivo.
+    caminhos_pdf = df["_pdf_path"].dropna().unique()
+    arquivos_nas_pastas = set()
+    for pasta_pdf_mes in {os.path.dirname(p) for p in caminhos_pdf}:
         try:
-            print(f"\n[INFO] Processando registro {i+1} - Vencimento: {row['Vencimento']} | ( R$ ): {row['( R$ )']}")
-        except KeyError as e:
-            print(f"[ERRO] Chave não encontrada: {e}")
+            with os.scandir(pasta_pdf_mes) as entradas:
+                arquivos_nas_pastas.update(
+                    os.path.normcase(entrada.path) for entrada in entradas if entrada.is_file()
+                )
+        except OSError:
             continue
-        resultado = processar_registro(row, base_pdf_folder)
-        df.at[i, "Encontrado"] = "Sim" if resultado else "Não"
+    # normcase não altera nada no macOS nem em montagens sem distinção de maiúsculas no Linux;
+    # por isso os caminhos ausentes da listagem ainda são confirmados com os.path.exists
+    existentes = {
+        p for p in caminhos_pdf
+        if os.path.normcase(p) in arquivos_nas_pastas or os.path.exists(p)
+    }
+
+    # Cria de uma vez a pasta "Notas" de cada mês cujo PDF referenciado existe
+    for pasta_pdf_mes in {os.path.dirname(p) for p in existentes}:
+        try:
+            os.makedirs(os.path.join(pasta_pdf_mes, "Notas"), exist_ok=True)
+        except OSError as e:
+            print(f"[ERRO] Não foi possível criar a pasta 'Notas' em '{pasta_pdf_mes}': {e}")
+
+    # Agrupa os registros pelo PDF de destino, para que cada arquivo seja aberto e lido uma única vez.
+    # Cada registro vai como tupla simples (índice, vencimento, valor, número da fatura).
+    colunas = ["Vencimento", "( R$ )", "_nf"]
+    tarefas = [
+        (caminho_pdf, dia_mes, caminho_pdf in existentes, list(grupo[colunas].itertuples(index=True, name=None)))
+        for (caminho_pdf, dia_mes), grupo in df.groupby(["_pdf_path", "_day_month"])
+    ]
+
+    # Processa os PDFs e atualiza a coluna "Encontrado"
+    if args.jobs <= 1 or len(tarefas) <= 1:
+        # Sem paralelismo útil: processa no próprio processo, sem o custo de iniciar o pool
+        for tarefa in tarefas:
+            for i, resultado in processar_grupo_worker(tarefa):
+                df.at[i, "Encontrado"] = "Sim" if resultado else "Não"
+    else:
+        # Processa os PDFs em paralelo (cada arquivo é independente).
+        # O número de processos é limitado (--jobs) para não multiplicar o uso de memória dos PDFs abertos.
+        opcoes_pool = {"max_workers": args.jobs}
+        if sys.version_info >= (3, 11):
+            # Reinicia cada processo periodicamente, devolvendo ao sistema a memória acumulada pelo PDFium
+            opcoes_pool["max_tasks_per_child"] = 64
+        processados = set()
+        try:
+            with ProcessPoolExecutor(**opcoes_pool) as executor:
+                for resultados in executor.map(processar_grupo_worker, tarefas, chunksize=4):
+                    for i, resultado in resultados:
+                        df.at[i, "Encontrado"] = "Sim" if resultado else "Não"
+                        processados.add(i)
+        except BrokenProcessPool as e:
+            # Um processo foi encerrado (ex.: falta de memória): os registros sem resultado ficam como "Não",
+            # e o Excel ainda é atualizado com o que foi processado
+            print(f"[ERRO] Um processo do pool foi encerrado inesperadamente: {e}")
+            pendentes = [
+                registro[0] for tarefa in tarefas for registro in tarefa[3] if registro[0] not in processados
+            ]
+            df.loc[pendentes, "Encontrado"] = "Não"
+
+    if args.overwrite:
+        # Regrava a planilha com os nomes de coluna originais, sem as colunas auxiliares
+        saida = df.iloc[:, :len(cabecalho_original)].copy()
+        saida.columns = cabecalho_original
+        if "Encontrado" not in df.columns[:len(cabecalho_original)]:
+            saida["Encontrado"] = df["Encontrado"]
+        try:
+            gravar_excel_write_only(saida, arquivo_excel)
+            print(f"\n[INFO] Arquivo '{arquivo_excel}' regravado com a coluna 'Encontrado' atualizada.")
+        except Exception as e:
+            print(f"[ERRO] Falha ao gravar o arquivo Excel: {e}")
+        return
 
     # Atualiza a coluna "Encontrado" no arquivo Excel mantendo o restante da formatação
     try:
@@ -226,14 +649,15 @@ def main():
         encontrado_col = None
         for cell in ws[1]:
             if cell.value == "Encontrado":
-                encontrado_col = cell.column_letter
+                encontrado_col = cell.column
                 break
 
         if encontrado_col is None:
             print("[ERRO] Coluna 'Encontrado' não encontrada no arquivo Excel.")
         else:
-            for i, row in df.iterrows():
-                ws[f"{encontrado_col}{i+2}"].value = row["Encontrado"]
+            # Escreve a coluna inteira a partir da lista de valores (linha 1 é o cabeçalho)
+            for linha, valor in enumerate(df["Encontrado"].tolist(), start=2):
+                ws.cell(row=linha, column=encontrado_col, value=valor)
             wb.save(arquivo_excel)
             print(f"\n[INFO] Coluna 'Encontrado' atualizada no arquivo '{arquivo_excel}'.")
     except Exception as e: